@@ -0,0 +1,182 @@
+"""Asyncio serving mode for the backend.
+
+Serves the same endpoints with the same request/response shapes as rest_api.py,
+but on Quart: Gemini calls use the SDK's async generation methods, so a request
+waiting on the model does not hold a worker thread. Transcription and other
+blocking work run in executors.
+
+Usage (from the backend directory):
+    hypercorn async_api:app --bind 0.0.0.0:5001
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import google.generativeai as genai
+from quart import Quart, request, jsonify
+from quart_cors import cors
+
+# Shares configuration, prompts and helpers with the synchronous app
+import rest_api
+
+
+# Initialize Quart app
+app = cors(Quart(__name__), allow_origin="*")
+
+# CPU-bound transcription gets its own small pool so it cannot starve other blocking calls.
+# Without an inference server every job runs on this process's single Whisper model,
+# which only transcribes one file at a time, so more than one worker buys nothing.
+TRANSCRIPTION_WORKERS = int(os.environ.get("TRANSCRIPTION_WORKERS", 2 if os.getenv("INFERENCE_SOCKET") else 1))
+transcription_executor = ThreadPoolExecutor(max_workers=TRANSCRIPTION_WORKERS)
+
+
+async def run_blocking(func, *args, executor=None):
+    """Runs a blocking call in an executor without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def generate_text_async(model, prompt, params):
+    """Async version of rest_api.generate_text."""
+    try:
+        response = await model.generate_content_async(prompt, generation_config=genai.GenerationConfig(**params))
+        return response.text
+    except Exception as e:
+        return f"Error: {e}"
+
+
+async def generate_structured_text_async(model, prompt, params, structure):
+    """Async version of rest_api.generate_structured_text."""
+    try:
+        structured_prompt = rest_api.build_structured_prompt(prompt, structure)
+        response = await model.generate_content_async(structured_prompt,
+                                                      generation_config=genai.GenerationConfig(**params))
+        return rest_api.parse_structured_response(response.text)
+
+    except Exception as e:
+        return {"error": f"Error: {e}"}
+
+
+async def generate_structured_map_reduce_async(model, content, question_type, num_questions, params, structure,
+                                               max_tokens=rest_api.CHUNK_TOKEN_BUDGET):
+    """Async version of rest_api.generate_structured_map_reduce."""
+    try:
+        jobs = rest_api.plan_map_reduce(content, question_type, num_questions, structure, max_tokens)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    # Same per-request fan-out limit as the threaded version
+    semaphore = asyncio.Semaphore(rest_api.MAP_MAX_WORKERS)
+
+    async def generate_chunk(chunk_prompt, chunk_structure):
+        async with semaphore:
+            return await generate_structured_text_async(model, chunk_prompt, params, chunk_structure)
+
+    results = await asyncio.gather(*(generate_chunk(*job) for job in jobs))
+    return rest_api.reduce_chunk_results(list(results), num_questions)
+
+
+@app.route("/upload-audio", methods=["POST"])
+async def upload_audio():
+    files = await request.files
+    audio_file = files.get("audio_file")
+    if audio_file:
+        await audio_file.save(os.path.join(rest_api.UPLOAD_FOLDER, audio_file.filename))
+        return jsonify({"message": "Audio uploaded successfully!"}), 200
+    return jsonify({"error": "No audio file provided."}), 400
+
+@app.route("/", methods=["GET"])
+async def index():
+    return jsonify({"message": "Welcome to the Gemini API!"})
+
+@app.route("/download-youtube-audio", methods=["POST"])
+async def download_youtube_audio():
+    data = await request.get_json()
+    youtube_url = data.get("youtube_url")
+
+    if not youtube_url:
+        return jsonify({"error": "YouTube URL is required"}), 400
+
+    try:
+        await run_blocking(rest_api.extract_youtube_audio, youtube_url)
+        return jsonify({"message": "Audio extracted successfully!"}), 200
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": "Failed to extract audio."}), 500
+
+@app.route("/get-files", methods=["GET"])
+async def get_files():
+    """Fetches the list of uploaded audio files."""
+    files = [f for f in os.listdir(rest_api.UPLOAD_FOLDER) if f.endswith(".wav")]
+    return jsonify(files)
+
+@app.route("/generateTranscript", methods=['POST'])
+async def generate_transcript():
+    """Generates transcript using OpenAI Whisper model."""
+    data = await request.get_json()
+    filename = data.get('filename')
+
+    if not filename or not os.path.exists(filename):
+        return jsonify({"error": "File not found"}), 400
+
+    try:
+        # Whisper transcription followed by SEGBOT segmentation, off the event loop
+        lines = await run_blocking(rest_api.run_inference_job, "transcribe", os.path.abspath(filename),
+                                   executor=transcription_executor)
+        segmented_transcript = await run_blocking(rest_api.run_inference_job, "segment", lines,
+                                                  executor=transcription_executor)
+
+        return jsonify({"transcript": segmented_transcript})
+    except Exception as e:
+        print(e)
+        return jsonify({"error": f"Error generating transcript: {str(e)}"}), 500
+
+
+@app.route('/generate', methods=['POST'])
+async def generate():
+    """Endpoint for generating text."""
+    data = await request.get_json()
+    engine = data.get('engine', 'models/gemma-3-27b-it')
+    prompt = data.get('prompt', '')
+    params = data.get('params', {})
+
+    model = rest_api.get_gemini_model(engine)
+    response = await generate_text_async(model, prompt, params)
+
+    return jsonify({'response': response})
+
+
+@app.route('/generate-structured-bulk', methods=['POST'])
+async def generate_structured_bulk():
+    try:
+        bulk = rest_api.parse_bulk_request(await request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    structure = rest_api.STRUCTURE_TYPES.get(bulk["question_type"], rest_api.STRUCTURE_TYPES["MTL"])
+
+    model = rest_api.get_gemini_model(bulk["engine"])
+
+    if bulk["long_content"]:
+        response = await generate_structured_map_reduce_async(model, bulk["prompt"], bulk["question_type"],
+                                                              bulk["num_questions"], bulk["params"], structure,
+                                                              bulk["chunk_tokens"])
+    else:
+        # Generate all questions in one API call
+        bulk_prompt = rest_api.build_bulk_prompt(bulk["prompt"], bulk["question_type"], bulk["num_questions"])
+        response = await generate_structured_text_async(model, bulk_prompt, bulk["params"], {
+            "questions": [structure] * bulk["num_questions"]  # Array of question structures
+        })
+
+    if "error" in response:
+        return jsonify({"error": response["error"]}), 400
+
+    # Return the array of questions, noting any chunks that failed
+    result = {"responses": response.get("questions", [])}
+    if "chunkErrors" in response:
+        result["chunkErrors"] = response["chunkErrors"]
+    return jsonify(result)
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get("PORT", 5001))
+    app.run(host='0.0.0.0', port=port)
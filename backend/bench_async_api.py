@@ -0,0 +1,162 @@
+"""Load-tests the asyncio serving mode against a local stand-in LLM.
+
+Usage (from the backend directory):
+    python bench_async_api.py [--concurrency 2000] [--latency 2.0] [--endpoint /generate]
+
+Starts async_api.py under Hypercorn in a separate process with Gemini replaced
+by a stand-in model that answers after --latency seconds. It then sends
+--concurrency simultaneous requests. Reports the peak number of generations
+in flight inside the server, throughput and request latency percentiles.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+
+STAND_IN_QUESTION = {
+    "questionType": "SOL",
+    "questionText": "Which step size does gradient descent use?",
+    "difficulty": 2,
+    "lot": {"lotId": "lot1", "lotItems": [{"id": "opt1", "lotItemText": "The learning rate"}]},
+    "solution": {"SOL": {"itemId": "opt1"}},
+}
+
+
+class StandInModel:
+    """Answers like a Gemini model after a fixed delay, counting generations in flight."""
+
+    in_flight = 0
+    peak_in_flight = 0
+    completed = 0
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        StandInModel.in_flight += 1
+        StandInModel.peak_in_flight = max(StandInModel.peak_in_flight, StandInModel.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            StandInModel.in_flight -= 1
+        StandInModel.completed += 1
+        return SimpleNamespace(text=json.dumps({"questions": [STAND_IN_QUESTION]}))
+
+
+def serve(port, latency, backlog):
+    """Runs async_api with the stand-in model (server side of the benchmark)."""
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+
+    import async_api
+    import rest_api
+
+    rest_api.get_gemini_model = lambda engine: StandInModel(latency)
+
+    @async_api.app.route("/stand-in-stats", methods=["GET"])
+    async def stand_in_stats():
+        return async_api.jsonify({
+            "peak_in_flight": StandInModel.peak_in_flight,
+            "completed": StandInModel.completed,
+        })
+
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.backlog = backlog
+    config.accesslog = None
+    asyncio.run(hypercorn_serve(async_api.app, config))
+
+
+async def http_request(port, method, path, body=None):
+    """Minimal HTTP/1.1 client, returns (status, parsed JSON body)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(content or b"null")
+
+
+async def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await http_request(port, "GET", "/")
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def load_test(port, concurrency, endpoint):
+    await wait_for_server(port)
+
+    if endpoint == "/generate":
+        body = {"prompt": "Explain gradient descent."}
+    else:
+        body = {"prompt": "Gradient descent lecture.", "questionType": "SOL", "numQuestions": 1}
+
+    async def timed_request():
+        started = time.perf_counter()
+        try:
+            status, _ = await http_request(port, "POST", endpoint, body)
+        except OSError:
+            status = None
+        return status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(timed_request() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    _, stats = await http_request(port, "GET", "/stand-in-stats")
+    return results, elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=2.0, help="Stand-in LLM latency in seconds")
+    parser.add_argument("--endpoint", default="/generate", choices=["/generate", "/generate-structured-bulk"])
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Every in-flight request holds a socket on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    if args.serve:
+        serve(args.port, args.latency, args.concurrency)
+        return
+
+    server = subprocess.Popen([sys.executable, __file__, "--serve", "--port", str(args.port),
+                               "--latency", str(args.latency), "--concurrency", str(args.concurrency)])
+    try:
+        results, elapsed, stats = asyncio.run(load_test(args.port, args.concurrency, args.endpoint))
+    finally:
+        server.terminate()
+        server.wait()
+
+    ok = sorted(latency for status, latency in results if status == 200)
+    failed = len(results) - len(ok)
+    print(f"endpoint            {args.endpoint}")
+    print(f"requests            {args.concurrency} concurrent, stand-in latency {args.latency:.2f}s")
+    print(f"succeeded / failed  {len(ok)} / {failed}")
+    print(f"peak in flight      {stats['peak_in_flight']} generations in one server process")
+    print(f"wall time           {elapsed:.2f}s ({len(ok) / elapsed:.0f} req/s)")
+    if ok:
+        print(f"latency p50 / p99   {ok[len(ok) // 2]:.2f}s / {ok[int(len(ok) * 0.99) - 1]:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
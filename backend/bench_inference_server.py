@@ -0,0 +1,143 @@
+"""Measures memory and throughput of in-worker models vs the shared inference server.
+
+Usage (from the backend directory, Linux only as RSS is read from /proc):
+    python bench_inference_server.py [--audio file.wav] [--workers 1 2 4 8] [--jobs 20]
+    python bench_inference_server.py --segment-only   # SEGBOT only, Whisper not loaded
+
+For each web worker count both setups are run:
+  local   every worker process loads its own Whisper and SEGBOT models
+  server  workers are lightweight clients of one inference_server.py process
+Each job segments a synthetic transcript, or transcribes and segments --audio.
+WHISPER_MODEL selects the Whisper checkpoint (a name or a local .pt path).
+Reports total peak RSS of all processes, wall time and jobs per second.
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def synthetic_transcript(sentences=300):
+    lines = []
+    for i in range(sentences):
+        lines += [f"{i * 3:.2f} --> {i * 3 + 3:.2f}", f"Sentence {i + 1} of the synthetic lecture transcript.", ""]
+    return lines
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return 0.0
+
+
+def run_jobs(run_job, jobs, audio):
+    lines = synthetic_transcript()
+    for _ in range(jobs):
+        if audio:
+            lines = run_job("transcribe", audio)
+        run_job("segment", lines)
+
+
+def local_worker(barrier, jobs, audio):
+    import inference_server
+    inference_server.load_models()
+    barrier.wait()
+    run_jobs(inference_server.run_local, jobs, audio)
+
+
+def server_worker(barrier, jobs, audio, socket_path):
+    import inference_client
+    barrier.wait()
+    run_jobs(lambda kind, payload: inference_client.run_job(kind, payload, socket_path), jobs, audio)
+
+
+def start_server(socket_path):
+    # A terminated server leaves its socket file behind
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = subprocess.Popen([sys.executable, "inference_server.py", "--socket", socket_path])
+    # The socket appears once the models are loaded
+    while not os.path.exists(socket_path):
+        if server.poll() is not None:
+            raise RuntimeError("Inference server exited during startup")
+        time.sleep(0.1)
+    return server
+
+
+def measure(mode, workers, jobs, audio, socket_path):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers + 1)
+    server = start_server(socket_path) if mode == "server" else None
+
+    if mode == "server":
+        procs = [ctx.Process(target=server_worker, args=(barrier, jobs, audio, socket_path)) for _ in range(workers)]
+    else:
+        procs = [ctx.Process(target=local_worker, args=(barrier, jobs, audio)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+
+    pids = [p.pid for p in procs] + ([server.pid] if server else [])
+    peak_rss = 0.0
+    running = threading.Event()
+    running.set()
+
+    def sample():
+        nonlocal peak_rss
+        while running.is_set():
+            peak_rss = max(peak_rss, sum(rss_mb(pid) for pid in pids))
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+
+    barrier.wait()
+    started = time.perf_counter()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    running.clear()
+    sampler.join()
+    if server:
+        server.terminate()
+        server.wait()
+
+    return peak_rss, elapsed, workers * jobs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", help="Audio file to transcribe in every job")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--jobs", type=int, default=20, help="Jobs per web worker")
+    parser.add_argument("--segment-only", action="store_true",
+                        help="Do not load Whisper (sets WHISPER_MODEL=none for all processes)")
+    args = parser.parse_args()
+
+    if args.segment_only:
+        if args.audio:
+            parser.error("--audio needs Whisper; drop --segment-only")
+        # Inherited by the spawned workers and the server process
+        os.environ["WHISPER_MODEL"] = "none"
+
+    audio = os.path.abspath(args.audio) if args.audio else None
+    socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+
+    print(f"{'workers':>7} {'mode':>7} {'peak RSS (MB)':>14} {'wall (s)':>9} {'jobs/s':>8}")
+    for workers in args.workers:
+        for mode in ("local", "server"):
+            peak_rss, elapsed, throughput = measure(mode, workers, args.jobs, audio, socket_path)
+            print(f"{workers:>7} {mode:>7} {peak_rss:>14.0f} {elapsed:>9.1f} {throughput:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Compares single-prompt and map-reduce bulk generation on a long transcript.
+
+Usage (from the backend directory, with GOOGLE_API_KEY set):
+    python bench_long_content.py [transcript.txt] [--questions N] [--type MTL]
+    python bench_long_content.py --stand-in   # offline, modelled latency
+
+Without a transcript file a long SEGBOT-style fixture transcript is generated.
+Reports wall-clock latency, number of model calls and token usage for each path.
+With --stand-in no API is called. Token counts use rest_api.estimate_tokens,
+and each call takes --base-latency plus per-token prefill and decode time, so
+its latencies only reflect those assumed constants, not Gemini. Stand-in
+questions cycle through difficulties 1-5 to exercise the balanced selection.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import rest_api
+
+
+FIXTURE_TOPICS = [
+    "gradient descent and how the learning rate controls the size of each update step",
+    "overfitting, the role of a validation set and early stopping",
+    "convolutional layers, kernels, strides and padding in image models",
+    "recurrent networks, vanishing gradients and why gated units help",
+    "attention, queries, keys and values and how transformers use them",
+    "evaluation metrics such as precision, recall and the F1 score",
+]
+
+
+def fixture_transcript(segments=60, sentences_per_segment=40):
+    """Builds a long transcript in the format returned by /generateTranscript."""
+    transcript = ""
+    for i in range(segments):
+        topic = FIXTURE_TOPICS[i % len(FIXTURE_TOPICS)]
+        text = " ".join(
+            f"In this part of the lecture we look at {topic}, point {j + 1} of segment {i + 1}."
+            for j in range(sentences_per_segment)
+        )
+        start_time = i * 60.0
+        transcript += f"Segment {i+1} [{start_time:.2f}s - {start_time + 59.0:.2f}s]:\n{text}\n\n"
+    return transcript
+
+
+STAND_IN_QUESTION = {
+    "questionType": "MTL",
+    "questionText": "Match each training technique with the problem it addresses in neural network training.",
+    "hintText": "Think about what goes wrong during training without each technique.",
+    "difficulty": 3,
+    "isParameterized": False,
+    "lots": [
+        {"lotId": "q1_lot1", "lotItems": [
+            {"id": "q1_a1", "lotItemText": "Early stopping"},
+            {"id": "q1_a2", "lotItemText": "Gated recurrent units"},
+            {"id": "q1_a3", "lotItemText": "Learning rate decay"},
+        ]},
+        {"lotId": "q1_lot2", "lotItems": [
+            {"id": "q1_b1", "lotItemText": "Overfitting to the training set"},
+            {"id": "q1_b2", "lotItemText": "Vanishing gradients over long sequences"},
+            {"id": "q1_b3", "lotItemText": "Oscillation around a minimum"},
+        ]},
+    ],
+    "solution": {"MTL": {"matches": [
+        {"itemIds": ["q1_a1", "q1_b1"]}, {"itemIds": ["q1_a2", "q1_b2"]}, {"itemIds": ["q1_a3", "q1_b3"]},
+    ]}},
+    "metaDetails": {"isStudentGenerated": False, "isAIGenerated": True},
+    "timeLimit": 300,
+    "points": 20,
+}
+
+
+class StandInModel:
+    """Offline replacement for a Gemini model with a simple latency model."""
+
+    def __init__(self, base_latency, prefill_ms, decode_ms):
+        self.base_latency = base_latency
+        self.prefill_ms = prefill_ms
+        self.decode_ms = decode_ms
+        self.generated = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None):
+        match = re.search(r"Generate (\d+) distinct questions", prompt)
+        count = int(match.group(1)) if match else 1
+        with self.lock:
+            first = self.generated
+            self.generated += count
+        questions = [dict(STAND_IN_QUESTION, difficulty=(first + i) % 5 + 1) for i in range(count)]
+        text = json.dumps({"questions": questions})
+        prompt_tokens = rest_api.estimate_tokens(prompt)
+        output_tokens = rest_api.estimate_tokens(text)
+        time.sleep(self.base_latency + (prompt_tokens * self.prefill_ms + output_tokens * self.decode_ms) / 1000)
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(
+            prompt_token_count=prompt_tokens, candidates_token_count=output_tokens
+        ))
+
+
+class UsageRecorder:
+    """Wraps a Gemini model and records token usage of every call."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, *args, **kwargs):
+        response = self.model.generate_content(*args, **kwargs)
+        usage = response.usage_metadata
+        with self.lock:
+            self.calls += 1
+            self.prompt_tokens += usage.prompt_token_count
+            self.output_tokens += usage.candidates_token_count
+        return response
+
+
+def run(name, generate):
+    started = time.perf_counter()
+    response, recorder = generate()
+    elapsed = time.perf_counter() - started
+    questions = response.get("questions", []) if "error" not in response else []
+    difficulties = Counter(question.get("difficulty") for question in questions)
+    mix = " ".join(f"{d}:{n}" for d, n in sorted(difficulties.items(), key=lambda item: str(item[0])))
+    print(f"{name:<12} {elapsed:>9.2f}s {recorder.calls:>6} {recorder.prompt_tokens:>10} "
+          f"{recorder.output_tokens:>10} {len(questions):>10}  {mix}{response.get('error', '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("transcript", nargs="?", help="Transcript file (defaults to a generated fixture)")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--type", default="MTL", choices=sorted(rest_api.STRUCTURE_TYPES))
+    parser.add_argument("--engine", default="models/gemma-3-27b-it")
+    parser.add_argument("--chunk-tokens", type=int, default=rest_api.CHUNK_TOKEN_BUDGET)
+    parser.add_argument("--stand-in", action="store_true", help="Use the offline stand-in model")
+    parser.add_argument("--base-latency", type=float, default=0.5, help="Stand-in seconds per call")
+    parser.add_argument("--prefill-ms", type=float, default=0.1, help="Stand-in ms per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=15.0, help="Stand-in ms per output token")
+    args = parser.parse_args()
+
+    def get_model():
+        if args.stand_in:
+            return StandInModel(args.base_latency, args.prefill_ms, args.decode_ms)
+        return rest_api.get_gemini_model(args.engine)
+
+    if args.transcript:
+        with open(args.transcript) as f:
+            content = f.read()
+    else:
+        content = fixture_transcript()
+
+    structure = rest_api.STRUCTURE_TYPES[args.type]
+    map_calls = len(rest_api.plan_map_reduce(content, args.type, args.questions, structure, args.chunk_tokens))
+    print(f"Content: ~{rest_api.estimate_tokens(content)} tokens, {map_calls} map calls, "
+          f"{args.questions} {args.type} questions" + (" (stand-in model)" if args.stand_in else "") + "\n")
+
+    def single_prompt():
+        recorder = UsageRecorder(get_model())
+        bulk_prompt = rest_api.build_bulk_prompt(content, args.type, args.questions)
+        response = rest_api.generate_structured_text(recorder, bulk_prompt, {}, {
+            "questions": [structure] * args.questions
+        })
+        return response, recorder
+
+    def map_reduce():
+        recorder = UsageRecorder(get_model())
+        response = rest_api.generate_structured_map_reduce(recorder, content, args.type, args.questions, {},
+                                                           structure, args.chunk_tokens)
+        return response, recorder
+
+    print(f"{'path':<12} {'latency':>10} {'calls':>6} {'prompt tok':>10} {'output tok':>10} {'questions':>10}  difficulty mix")
+    run("single", single_prompt)
+    run("map-reduce", map_reduce)
+
+
+if __name__ == '__main__':
+    main()
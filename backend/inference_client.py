@@ -0,0 +1,58 @@
+"""Client for the shared inference server (see inference_server.py).
+
+Only uses the standard library, so web workers that talk to the server do not
+import torch or Whisper.
+"""
+import os
+from multiprocessing.connection import Client
+
+
+DEFAULT_SOCKET_PATH = "/tmp/quegen-inference.sock"
+DEFAULT_TIMEOUT = 600  # Seconds to wait for a result; long recordings take minutes to transcribe
+
+
+class InferenceError(Exception):
+    """Raised when the inference server fails to run a job."""
+
+
+def socket_path():
+    return os.environ.get("INFERENCE_SOCKET", DEFAULT_SOCKET_PATH)
+
+
+def key_path(path=None):
+    """The file the server writes its authentication key to, next to the socket."""
+    return (path or socket_path()) + ".key"
+
+
+def authkey(path=None):
+    """Returns the key both ends use to authenticate each other.
+
+    INFERENCE_AUTHKEY takes precedence (needed when the server and the web
+    workers run as different users); otherwise the server's key file is read.
+    """
+    key = os.environ.get("INFERENCE_AUTHKEY")
+    if key:
+        return key.encode()
+
+    with open(key_path(path), "rb") as f:
+        # Jobs are pickled, so never trust a key another user could have written or read
+        stat = os.fstat(f.fileno())
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+            raise InferenceError(f"{key_path(path)} must be owned by this user and not readable by others")
+        return f.read()
+
+
+def run_job(kind, payload, path=None, timeout=None):
+    """Sends one job to the inference server and waits for its result."""
+    path = path or socket_path()
+    if timeout is None:
+        timeout = float(os.environ.get("INFERENCE_TIMEOUT", DEFAULT_TIMEOUT))
+
+    with Client(path, family="AF_UNIX", authkey=authkey(path)) as conn:
+        conn.send((kind, payload))
+        if not conn.poll(timeout):
+            raise InferenceError(f"No response from the inference server within {timeout:.0f}s")
+        result, error = conn.recv()
+    if error is not None:
+        raise InferenceError(error)
+    return result
@@ -0,0 +1,333 @@
+"""Local inference server that owns the Whisper and SEGBOT models.
+
+Web workers send transcription and segmentation jobs over a Unix socket
+(see inference_client.py) instead of loading their own model copies. Each job
+type has its own queue and thread, so short segmentation jobs never wait
+behind long transcriptions. Whisper transcribes one file at a time; SEGBOT
+jobs from all workers are collected into micro-batches and run as one padded
+forward pass.
+
+Both ends authenticate with a shared key: INFERENCE_AUTHKEY if set, otherwise
+a random key the server writes to "<socket>.key" (mode 0600) on startup.
+Setting WHISPER_MODEL=none starts a segmentation-only server.
+
+Usage (from the backend directory):
+    python inference_server.py [--socket /tmp/quegen-inference.sock]
+"""
+import argparse
+import os
+import queue
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+import torch
+import model
+from inference_client import InferenceError, authkey, key_path, socket_path
+
+
+SOCKET_PATH = socket_path()
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+
+# Model Hyperparameters
+INPUT_DIM = 128  # Example input size
+HIDDEN_DIM = 256  # Hidden layer size
+
+# Micro-batching settings
+MAX_BATCH_SIZE = 16  # Jobs per batch
+BATCH_WINDOW = 0.01  # Seconds to wait for more jobs after the first one arrives
+
+
+models_lock = threading.Lock()
+loaded_models = None
+
+# Whisper's decoder installs kv-cache hooks on the shared model for every decode,
+# so concurrent transcriptions with one model corrupt each other
+transcription_lock = threading.Lock()
+
+
+def load_models():
+    """Loads the Whisper and SEGBOT models once per process."""
+    global loaded_models
+    with models_lock:
+        if loaded_models is None:
+            whisper_model = None
+            if WHISPER_MODEL != "none":
+                import whisper
+                whisper_model = whisper.load_model(WHISPER_MODEL)
+            model_seg = model.SEGBOT(INPUT_DIM, HIDDEN_DIM)
+            model_seg.eval()
+            loaded_models = (whisper_model, model_seg)
+        return loaded_models
+
+
+def load_text_file(lines):
+    """Load transcript with sentence-level timestamps."""
+    sentences = []
+    timestamps = []
+
+    for i in range(0, len(lines), 3):
+      if i + 1 >= len(lines):  # Skip if not enough lines left
+          continue
+
+      time_range = lines[i].strip().split(" --> ")
+
+      # Skip invalid time ranges
+      if len(time_range) != 2:
+          continue
+
+      try:
+          start_time = float(time_range[0])
+          end_time = float(time_range[1])
+      except ValueError:
+          continue
+
+      text = lines[i + 1].strip()
+
+      if text:  # Only add if text is not empty
+          sentences.append(text)
+          timestamps.append((start_time, end_time))
+
+    tokens = [word for sent in sentences for word in sent.split()]
+    return sentences, tokens, timestamps
+
+
+def transcribe(whisper_model, filename):
+    """Transcribes an audio file into timestamped transcript lines."""
+    if whisper_model is None:
+        raise ValueError("Transcription is disabled (WHISPER_MODEL=none)")
+    result = whisper_model.transcribe(filename, word_timestamps=False)
+    segments = result['segments']
+
+    # Initialize an empty string to accumulate the text
+    text_output = ""
+
+    # Loop through the segments and append the formatted text to the text_output variable
+    for seg in segments:
+        start_time = seg['start']
+        end_time = seg['end']
+        text = seg['text'].strip()
+        text_output += f"{start_time:.2f} --> {end_time:.2f}\n{text}\n\n"
+    return text_output.split('\n')
+
+
+def format_segments(segments):
+    """Formats SEGBOT segments as the transcript returned by /generateTranscript."""
+    # Initialize an empty string to accumulate the segmented transcript
+    segmented_transcript = ""
+
+    # Try to process the segments and handle any errors
+    try:
+        if segments:
+            for i, segment in enumerate(segments):
+                # Extract start time, end time, and text from each segment
+                start_time = segment["start_time"]
+                end_time = segment["end_time"]
+                text = segment["text"]
+
+                # Append formatted text to the transcript string
+                segmented_transcript += f"Segment {i+1} [{start_time:.2f}s - {end_time:.2f}s]:\n{text}\n\n"
+
+    except KeyError as e:
+        segmented_transcript = f"KeyError: Missing expected key {e} in one of the segments."
+    except Exception as e:
+        segmented_transcript = f"An error occurred: {e}"
+
+    return segmented_transcript
+
+
+def segment_batch(model_seg, transcripts):
+    """Segments several transcripts (lists of lines) with one SEGBOT forward pass.
+
+    Returns one formatted transcript string, or an Exception, per input.
+    """
+    results = [None] * len(transcripts)
+    parsed = []
+    for i, lines in enumerate(transcripts):
+        sentences, tokens, timestamps = load_text_file(lines)
+        if not tokens:
+            results[i] = ValueError("Transcript has no timestamped sentences")
+            continue
+        parsed.append((i, sentences, tokens, timestamps))
+
+    if not parsed:
+        return results
+
+    # Example Input (Dummy Tensor), zero-padded to the longest transcript in the batch
+    lengths = [len(tokens) for _, _, tokens, _ in parsed]
+    x = torch.zeros(len(parsed), max(lengths), INPUT_DIM)
+    for row, length in enumerate(lengths):
+        x[row, :length] = torch.randn(length, INPUT_DIM)
+
+    with torch.no_grad():
+        output = model_seg(x, 0, lengths)
+
+    for row, (i, sentences, tokens, timestamps) in enumerate(parsed):
+        try:
+            segments = model_seg.segment_text(sentences, tokens, timestamps, output[row, :lengths[row]])
+            results[i] = format_segments(segments)
+        except Exception as e:
+            results[i] = e
+    return results
+
+
+class Job:
+    """A single request waiting in the batching queue."""
+
+    def __init__(self, kind, payload):
+        self.kind = kind
+        self.payload = payload
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def finish(self, result):
+        if isinstance(result, Exception):
+            self.error = str(result)
+        else:
+            self.result = result
+        self.done.set()
+
+
+def run_transcription_job(whisper_model, job):
+    try:
+        job.finish(transcribe(whisper_model, job.payload))
+    except Exception as e:
+        job.finish(e)
+
+
+def run_segmentation_jobs(model_seg, jobs):
+    try:
+        results = segment_batch(model_seg, [job.payload for job in jobs])
+    except Exception as e:
+        results = [e] * len(jobs)
+    for job, result in zip(jobs, results):
+        job.finish(result)
+
+
+def run_local(kind, payload):
+    """Runs a single job in this process, for deployments without a shared server."""
+    whisper_model, model_seg = load_models()
+    job = Job(kind, payload)
+    if kind == "transcribe":
+        # Request threads share the model, so transcriptions run one at a time
+        with transcription_lock:
+            run_transcription_job(whisper_model, job)
+    elif kind == "segment":
+        run_segmentation_jobs(model_seg, [job])
+    else:
+        job.finish(ValueError(f"Unknown job type: {kind}"))
+
+    if job.error is not None:
+        raise InferenceError(job.error)
+    return job.result
+
+
+class InferenceServer:
+    """Accepts jobs on a Unix socket and runs them on per-type inference threads."""
+
+    def __init__(self, socket_path=SOCKET_PATH, max_batch_size=MAX_BATCH_SIZE, batch_window=BATCH_WINDOW):
+        self.socket_path = socket_path
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.queues = {"transcribe": queue.Queue(), "segment": queue.Queue()}
+        self.whisper_model, self.model_seg = load_models()
+
+    def next_batch(self, jobs):
+        """Blocks for one job, then collects more until the batch is full or the window closes."""
+        batch = [jobs.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def transcription_loop(self):
+        # The only thread using Whisper, which has no cross-file batching
+        while True:
+            run_transcription_job(self.whisper_model, self.queues["transcribe"].get())
+
+    def segmentation_loop(self):
+        while True:
+            run_segmentation_jobs(self.model_seg, self.next_batch(self.queues["segment"]))
+
+    def handle_connection(self, conn):
+        """Serves one client connection; each request is a (kind, payload) tuple."""
+        try:
+            while True:
+                try:
+                    kind, payload = conn.recv()
+                except EOFError:
+                    break
+                job = Job(kind, payload)
+                if kind in self.queues:
+                    self.queues[kind].put(job)
+                else:
+                    job.finish(ValueError(f"Unknown job type: {kind}"))
+                job.done.wait()
+                conn.send((job.result, job.error))
+        finally:
+            conn.close()
+
+    def create_authkey(self):
+        """Returns INFERENCE_AUTHKEY, or writes a fresh random key file readable only by this user."""
+        if os.environ.get("INFERENCE_AUTHKEY"):
+            return authkey(self.socket_path)
+
+        path = key_path(self.socket_path)
+        if os.path.exists(path):
+            os.remove(path)
+        key = secrets.token_hex(32).encode()
+        # O_EXCL: never write the key into a file someone else created in the meantime
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        threading.Thread(target=self.transcription_loop, daemon=True).start()
+        threading.Thread(target=self.segmentation_loop, daemon=True).start()
+
+        # Jobs are pickled: the socket is created owner-only and every
+        # connection must prove it knows the key before anything is unpickled
+        previous_umask = os.umask(0o077)
+        try:
+            key = self.create_authkey()
+            listener = Listener(self.socket_path, family="AF_UNIX", authkey=key)
+        finally:
+            os.umask(previous_umask)
+
+        with listener:
+            print(f"Inference server listening on {self.socket_path}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    # Failed authentication or a client that hung up mid-handshake
+                    print(f"Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the shared Whisper/SEGBOT inference server.")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW)
+    args = parser.parse_args()
+
+    InferenceServer(args.socket, args.max_batch_size, args.batch_window).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
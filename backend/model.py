@@ -19,9 +19,16 @@ class Encoder(nn.Module):
         self.hidden_dim = hidden_dim
         self.bigru = nn.GRU(input_dim, hidden_dim, bidirectional=True, batch_first=True)
 
-    def forward(self, x):
-        h, _ = self.bigru(x)
-        return h  # h ∈ R^(N × 2H)
+    def forward(self, x, lengths=None):
+        if lengths is None:
+            h, _ = self.bigru(x)
+            return h  # h ∈ R^(N × 2H)
+
+        # Padded batch: pack so padding does not leak into the backward direction
+        packed = nn.utils.rnn.pack_padded_sequence(x, lengths, batch_first=True, enforce_sorted=False)
+        h, _ = self.bigru(packed)
+        h, _ = nn.utils.rnn.pad_packed_sequence(h, batch_first=True, total_length=x.size(1))
+        return h
 
 
 class Decoder(nn.Module):
@@ -42,8 +49,10 @@ class Pointer(nn.Module):
         self.W2 = nn.Linear(decoder_hidden_dim, decoder_hidden_dim)
         self.v = nn.Linear(decoder_hidden_dim, 1, bias=False)
 
-    def forward(self, encoder_outputs, decoder_state):
+    def forward(self, encoder_outputs, decoder_state, mask=None):
         scores = self.v(torch.tanh(self.W1(encoder_outputs) + self.W2(decoder_state)))
+        if mask is not None:
+            scores = scores.masked_fill(~mask.unsqueeze(-1), float("-inf"))
         attention_weights = F.softmax(scores, dim=1)
         return attention_weights
 
@@ -55,12 +64,18 @@ class SEGBOT(nn.Module):
         self.decoder = Decoder(hidden_dim)
         self.pointer = Pointer(hidden_dim * 2, hidden_dim)
 
-    def forward(self, x, start_units):
-        encoder_outputs = self.encoder(x)
+    def forward(self, x, start_units, lengths=None):
+        encoder_outputs = self.encoder(x, lengths)
         decoder_hidden = torch.zeros(1, x.size(0), self.decoder.hidden_dim).to(x.device)
         decoder_inputs = encoder_outputs[:, start_units, :].unsqueeze(1)
         decoder_outputs, _ = self.decoder(decoder_inputs, decoder_hidden)
-        attention_weights = self.pointer(encoder_outputs, decoder_outputs.squeeze(1))
+        mask = None
+        if lengths is not None:
+            # Only point at real (non-padding) positions of each sequence
+            positions = torch.arange(x.size(1), device=x.device).unsqueeze(0)
+            mask = positions < torch.as_tensor(lengths, device=x.device).unsqueeze(1)
+        # Keep the time axis so the decoder state broadcasts over every position in the batch
+        attention_weights = self.pointer(encoder_outputs, decoder_outputs, mask)
         return attention_weights
 
     def segment_text(self, sentences, tokens, timestamps, attention_weights):
@@ -4,14 +4,13 @@ import google.generativeai as genai
 import json
 from dotenv import load_dotenv
 import os
+import re
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import yt_dlp
-from transformers import pipeline
-import whisper
-#from backend 
-import model 
-import torch
 import subprocess
+import inference_client
 
 
 # Initialize Flask app
@@ -29,6 +28,26 @@ UPLOAD_FOLDER = "static/uploads"
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# Long-content (map-reduce) generation settings
+CHUNK_TOKEN_BUDGET = 4000  # Estimated content tokens per chunk prompt
+CANDIDATE_OVERSAMPLE = 1.5  # Candidates generated per requested question
+MAP_MAX_WORKERS = 8  # Parallel chunk requests
+MIN_CHUNK_TOKENS = 500  # Smaller chunks only multiply model calls
+MAX_CHUNK_TOKENS = 16000  # Keeps every chunk prompt well inside the model context
+MAX_MAP_CHUNKS = 16  # Upper bound on model calls per map-reduce request
+MAX_BULK_QUESTIONS = 50  # Upper bound on numQuestions per bulk request
+SEGMENT_START = re.compile(r"(?=^Segment \d+ \[)", re.MULTILINE)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def run_inference_job(kind, payload):
+    """Runs a transcription/segmentation job on the shared inference server if one is configured."""
+    if os.getenv("INFERENCE_SOCKET"):
+        return inference_client.run_job(kind, payload)
+
+    # No shared server: load the models in this worker (imports torch and Whisper)
+    import inference_server
+    return inference_server.run_local(kind, payload)
+
 def get_gemini_model(model_name="gemini-pro"):
     """Helper function to initialize Gemini AI model."""
     try:
@@ -46,499 +65,318 @@ def generate_text(model, prompt, params):
         return f"Error: {e}"
     
 
-def generate_structured_text(model, prompt, params, structure):
+def build_structured_prompt(prompt, structure):
+    """Wraps the content in formatting instructions for the given JSON structure."""
+    question_type = structure.get('questionType', '')
+    
+    # Enhanced prompt with specific formatting instructions
+    # Prepare type-specific rules
+    otl_rules = '''
+    For OTL (Ordering) questions:
+    - List items should be in RANDOM order in the question
+    - Solution should show the correct order
+    - Each step should be clear and distinct
+    - Include clear sequence indicators''' if question_type == 'OTL' else ''
+    
+    mtl_rules = '''
+    For MTL (Matching) questions:
+    - Ensure pairs are logically related
+    - Both lists should have equal number of items
+    - Make relationships clear but not obvious''' if question_type == 'MTL' else ''
+    
+    sml_rules = '''
+    For SML (Multiple Select) questions:
+    - Include MULTIPLE correct answers (at least 2)
+    - Clearly indicate all correct options in solution
+    - Each option should be distinct''' if question_type == 'SML' else ''
+    
+    sol_rules = '''
+    For SOL (Single Option) questions:
+    - Only one correct answer
+    - All options should be plausible
+    - Clear explanation for correct/incorrect''' if question_type == 'SOL' else ''
+    
+    structured_prompt = f"""
+    Based on this content: {prompt}
+
+    Generate a question following these STRICT formatting rules:
+    1. Replace all placeholder IDs with unique alphanumeric identifiers (e.g., 'opt1', 'opt2', etc.)
+    2. Replace 'Rich Text/Markdown' with actual question text
+    3. Replace 'Text Value' with meaningful answer options
+    4. Ensure all explanations are detailed and helpful
+    5. Set appropriate difficulty level (1-5)
+    6. Generate realistic parameter values if isParameterized is True
+
+    Additional rules based on question type:
+    {otl_rules}
+    {mtl_rules}
+    {sml_rules}
+    {sol_rules}
+
+    The response MUST follow this EXACT JSON structure (replace all placeholders):
+    {json.dumps(structure, indent=2)}
+
+    Important:
+    - Generate ONLY valid JSON
+    - NO text outside JSON structure
+    - NO markdown code blocks
+    - ALL IDs must be unique
+    - ALL placeholder values must be replaced
+    """
+    return structured_prompt
+
+
+def parse_structured_response(response_text):
+    """Parses and validates the JSON returned for a structured prompt."""
     try:
-        question_type = structure.get('questionType', '')
+        # Clean and parse the response
+        start_index = response_text.find('{')
+        end_index = response_text.rfind('}') + 1
+        cleaned_response = response_text[start_index:end_index]
+        parsed_response = json.loads(cleaned_response)
         
-        # Enhanced prompt with specific formatting instructions
-        # Prepare type-specific rules
-        otl_rules = '''
-        For OTL (Ordering) questions:
-        - List items should be in RANDOM order in the question
-        - Solution should show the correct order
-        - Each step should be clear and distinct
-        - Include clear sequence indicators''' if question_type == 'OTL' else ''
+        # Validate the response has no placeholder values
+        if any(placeholder in str(parsed_response) for placeholder in [
+            "ID of the LOT", "ID of the LOT item", "Text Value", 
+            "Rich Text/Markdown", "ID of item in lot"
+        ]):
+            return {"error": "Response contains placeholder values that were not replaced"}
         
-        mtl_rules = '''
-        For MTL (Matching) questions:
-        - Ensure pairs are logically related
-        - Both lists should have equal number of items
-        - Make relationships clear but not obvious''' if question_type == 'MTL' else ''
+        # Additional validation based on question type
+        question_type = parsed_response.get('questionType', '')
         
-        sml_rules = '''
-        For SML (Multiple Select) questions:
-        - Include MULTIPLE correct answers (at least 2)
-        - Clearly indicate all correct options in solution
-        - Each option should be distinct''' if question_type == 'SML' else ''
-        
-        sol_rules = '''
-        For SOL (Single Option) questions:
-        - Only one correct answer
-        - All options should be plausible
-        - Clear explanation for correct/incorrect''' if question_type == 'SOL' else ''
-        
-        structured_prompt = f"""
-        Based on this content: {prompt}
-
-        Generate a question following these STRICT formatting rules:
-        1. Replace all placeholder IDs with unique alphanumeric identifiers (e.g., 'opt1', 'opt2', etc.)
-        2. Replace 'Rich Text/Markdown' with actual question text
-        3. Replace 'Text Value' with meaningful answer options
-        4. Ensure all explanations are detailed and helpful
-        5. Set appropriate difficulty level (1-5)
-        6. Generate realistic parameter values if isParameterized is True
-
-        Additional rules based on question type:
-        {otl_rules}
-        {mtl_rules}
-        {sml_rules}
-        {sol_rules}
-
-        The response MUST follow this EXACT JSON structure (replace all placeholders):
-        {json.dumps(structure, indent=2)}
-
-        Important:
-        - Generate ONLY valid JSON
-        - NO text outside JSON structure
-        - NO markdown code blocks
-        - ALL IDs must be unique
-        - ALL placeholder values must be replaced
-        """
-
-        response = model.generate_content(structured_prompt, generation_config=genai.GenerationConfig(**params))
-        response_text = response.text
-
-        try:
-            # Clean and parse the response
-            start_index = response_text.find('{')
-            end_index = response_text.rfind('}') + 1
-            cleaned_response = response_text[start_index:end_index]
-            parsed_response = json.loads(cleaned_response)
-            
-            # Validate the response has no placeholder values
-            if any(placeholder in str(parsed_response) for placeholder in [
-                "ID of the LOT", "ID of the LOT item", "Text Value", 
-                "Rich Text/Markdown", "ID of item in lot"
-            ]):
-                return {"error": "Response contains placeholder values that were not replaced"}
-            
-            # Additional validation based on question type
-            question_type = parsed_response.get('questionType', '')
-            
-            if question_type == 'SML':
-                # Ensure multiple correct answers for SML
-                solution = parsed_response.get('solution', {}).get('SML', {})
-                if solution and len(solution.get('itemIds', [])) < 2:
-                    return {"error": "SML questions must have at least 2 correct answers"}
-                    
-            elif question_type == 'OTL':
-                # Ensure options are in different order than solution
-                lot_items = parsed_response.get('lot', {}).get('lotItems', [])
-                solution_orders = parsed_response.get('solution', {}).get('OTL', {}).get('orders', [])
+        if question_type == 'SML':
+            # Ensure multiple correct answers for SML
+            solution = parsed_response.get('solution', {}).get('SML', {})
+            if solution and len(solution.get('itemIds', [])) < 2:
+                return {"error": "SML questions must have at least 2 correct answers"}
                 
-                if lot_items and solution_orders:
-                    question_order = [item['id'] for item in lot_items]
-                    solution_order = sorted(solution_orders, key=lambda x: x['order'])
-                    solution_order = [item['itemId'] for item in solution_order]
-                    
-                    if question_order == solution_order:
-                        # Randomly shuffle the lot items
-                        import random
-                        random.shuffle(lot_items)
-                        parsed_response['lot']['lotItems'] = lot_items
+        elif question_type == 'OTL':
+            # Ensure options are in different order than solution
+            lot_items = parsed_response.get('lot', {}).get('lotItems', [])
+            solution_orders = parsed_response.get('solution', {}).get('OTL', {}).get('orders', [])
+            
+            if lot_items and solution_orders:
+                question_order = [item['id'] for item in lot_items]
+                solution_order = sorted(solution_orders, key=lambda x: x['order'])
+                solution_order = [item['itemId'] for item in solution_order]
                 
-            return parsed_response
+                if question_order == solution_order:
+                    # Randomly shuffle the lot items
+                    import random
+                    random.shuffle(lot_items)
+                    parsed_response['lot']['lotItems'] = lot_items
             
-        except (ValueError, json.JSONDecodeError, IndexError) as e:
-            return {"error": "LLM response was not valid JSON.", "raw_response": response_text, "parsing_error": str(e)}
-
-    except Exception as e:
-        return {"error": f"Error: {e}"}
-    
-
-def load_text_file(lines):
-    """Load transcript with sentence-level timestamps."""
-    sentences = []
-    timestamps = []
-
-    for i in range(0, len(lines), 3):
-      if i + 1 >= len(lines):  # Skip if not enough lines left
-          continue
-
-      time_range = lines[i].strip().split(" --> ")
-
-      # Skip invalid time ranges
-      if len(time_range) != 2:
-          continue
-
-      try:
-          start_time = float(time_range[0])
-          end_time = float(time_range[1])
-      except ValueError:
-          continue
-
-      text = lines[i + 1].strip()
-
-      if text:  # Only add if text is not empty
-          sentences.append(text)
-          timestamps.append((start_time, end_time))
-
-    tokens = [word for sent in sentences for word in sent.split()]
-    return sentences, tokens, timestamps
-
-
-
-@app.route("/upload-audio", methods=["POST"])
-def upload_audio():
-    audio_file = request.files.get("audio_file")
-    if audio_file:
-        audio_file.save(os.path.join(UPLOAD_FOLDER, audio_file.filename))
-        return jsonify({"message": "Audio uploaded successfully!"}), 200
-    return jsonify({"error": "No audio file provided."}), 400
-
-@app.route("/", methods=["GET"])
-def index():
-    return jsonify({"message": "Welcome to the Gemini API!"})
-
-@app.route("/download-youtube-audio", methods=["POST"])
-def download_youtube_audio():
-    data = request.get_json()
-    youtube_url = data.get("youtube_url")
-
-    if not youtube_url:
-        return jsonify({"error": "YouTube URL is required"}), 400
-
-    try: 
-        # Define yt-dlp options
-        ydl_opts = {
-            'format': 'bestaudio/best',  # Download the best audio
-            'extractaudio': True,        # Extract audio (no video)
-            'audioquality': 0,           # Best quality for audio
-            'outtmpl': f'{UPLOAD_FOLDER}/youtube_%(title)s.%(ext)s',  # Use video title for filename
-            'quiet': False,              # Show download progress
-        }
+        return parsed_response
         
-        # Create and run yt-dlp instance to download audio
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(youtube_url, download=True)
-            audio_file = ydl.prepare_filename(info_dict)
-
-        output_wav = audio_file.rsplit('.', 1)[0] + '.wav'  # Change the extension to .wav
-
-        # Run FFmpeg conversion command
-        subprocess.run(['ffmpeg', '-i', audio_file, output_wav])
-
-        # Optionally, delete the original audio file (if you don't need it)
-        import os
-        os.remove(audio_file)
-        
-        return jsonify({"message": "Audio extracted successfully!"}), 200
-    except Exception as e:
-        print(f"Error: {e}")
-        return jsonify({"error": "Failed to extract audio."}), 500
+    except (ValueError, json.JSONDecodeError, IndexError) as e:
+        return {"error": "LLM response was not valid JSON.", "raw_response": response_text, "parsing_error": str(e)}
 
-@app.route("/get-files", methods=["GET"])
-def get_files():
-    """Fetches the list of uploaded audio files."""
-    files = [f for f in os.listdir(UPLOAD_FOLDER) if f.endswith(".wav")]
-    return jsonify(files)
-
-@app.route("/generateTranscript", methods=['POST'])
-def generate_transcript():
-    """Generates transcript using OpenAI Whisper model."""
-    data = request.get_json()
-    filename = data.get('filename')
-
-    if not filename or not os.path.exists(filename):
-        return jsonify({"error": "File not found"}), 400
 
+def generate_structured_text(model, prompt, params, structure):
     try:
-        #pipe = pipeline("automatic-speech-recognition", model="openai/whisper-large-v3")
-        #transcript = pipe(filename, return_timestamps=True)
-        whisper_model = whisper.load_model("base")  
-        result = whisper_model.transcribe(filename, word_timestamps=False)
-        segments = result['segments']
-
-
-        # Initialize an empty string to accumulate the text
-        text_output = ""
-
-        # Loop through the segments and append the formatted text to the text_output variable
-        for seg in segments:
-            start_time = seg['start']
-            end_time = seg['end']
-            text = seg['text'].strip()
-            text_output += f"{start_time:.2f} --> {end_time:.2f}\n{text}\n\n"
-        text_output = text_output.split('\n')
-
-        
-        # Model Hyperparameters
-        input_dim = 128  # Example input size
-        hidden_dim = 256  # Hidden layer size
-        model_seg = model.SEGBOT(input_dim, hidden_dim)
-
-        # Load text file and process with sentence-level timestamps
-          # Ensure sentence-level transcript format
-        sentences, tokens, timestamps = load_text_file(text_output)
-
-        # Example Input (Dummy Tensor)
-        x = torch.randn(1, len(tokens), input_dim)  # Batch size of 1, sequence length based on text
-        start_units = 0
-        output = model_seg(x, start_units)
-
-        # Segment the text and get timestamps
-        segments = model_seg.segment_text(sentences, tokens, timestamps, output)
-
-        # Initialize an empty string to accumulate the segmented transcript
-        segmented_transcript = ""; err = ''
-
-        # Try to process the segments and handle any errors
-        try:
-            if segments:
-                for i, segment in enumerate(segments):
-                    # Extract start time, end time, and text from each segment
-                    start_time = segment["start_time"]
-                    end_time = segment["end_time"]
-                    text = segment["text"]
-                    
-                    # Append formatted text to the transcript string
-                    segmented_transcript += f"Segment {i+1} [{start_time:.2f}s - {end_time:.2f}s]:\n{text}\n\n"
-            else:
-                err = "No valid segments found. Terminating execution."
-
-        except KeyError as e:
-            segmented_transcript = f"KeyError: Missing expected key {e} in one of the segments."
-        except Exception as e:
-            segmented_transcript = f"An error occurred: {e}"
-
-        # The variable 'segmented_transcript' now contains the segmented transcript
+        structured_prompt = build_structured_prompt(prompt, structure)
+        response = model.generate_content(structured_prompt, generation_config=genai.GenerationConfig(**params))
+        return parse_structured_response(response.text)
 
-        return jsonify({"transcript": segmented_transcript})
     except Exception as e:
-        print(e)
-        return jsonify({"error": f"Error generating transcript: {str(e)}"}), 500
-
-
-
-@app.route('/generate', methods=['POST'])
-def generate():
-    """Endpoint for generating text."""
-    data = request.get_json()
-    engine = data.get('engine', 'models/gemma-3-27b-it')  # Default to gemini-pro
-    prompt = data.get('prompt', '')
-    params = data.get('params', {})
-
-    model = get_gemini_model(engine)
-    response = generate_text(model, prompt, params)
-
-    return jsonify({'response': response})
-
-
-@app.route('/generate-structured-bulk', methods=['POST'])
-def generate_structured_bulk():
-    data = request.get_json()
-    engine = data.get('engine', 'models/gemma-3-27b-it')
-    prompt = data.get('prompt', '')
-    question_type = data.get('questionType', 'MTL')
-    num_questions = data.get('numQuestions', 1)
-    params = data.get('params', {})
+        return {"error": f"Error: {e}"}
     
-    # Get the appropriate structure template
-    structure_types = {
-        "SOL": {
-            "questionType": "SOL",
-            "questionText": "Rich Text/Markdown",
-            "hintText": "Rich Text/ Markdown",
-            "difficulty": 2,
-            "isParameterized": True,
-            "parameters": {
-                "parameterName": "a",
-                "allowedValued": ["2", "3", "9"]
-            },
-            "lot": {
+
+# Question structure templates, keyed by question type
+STRUCTURE_TYPES = {
+    "SOL": {
+        "questionType": "SOL",
+        "questionText": "Rich Text/Markdown",
+        "hintText": "Rich Text/ Markdown",
+        "difficulty": 2,
+        "isParameterized": True,
+        "parameters": {
+            "parameterName": "a",
+            "allowedValued": ["2", "3", "9"]
+        },
+        "lot": {
+            "lotId": "ID of the LOT",
+            "lotItems": [
+                {
+                    "id": "ID of the LOT item",
+                    "lotItemText": "Text Value",
+                    "explaination": "Explaination as why this option is correct/incorrect"
+                },
+                {
+                    "id": "ID of the LOT item",
+                    "lotItemText": "Text Value",
+                    "explaination": "Explaination as why this option is correct/incorrect"
+                }
+            ]
+        },
+        "solution": {
+            "SOL": {
+                "itemId": "ID of the solution item in the lot"
+            }
+        },
+        "metaDetails": {
+            "isStudentGenerated": True,
+            "isAIGenerated": False
+        },
+        "timeLimit": 300,
+        "points": 20
+    },
+    "SML": {
+        "questionType": "SML",
+        "questionText": "Rich Text/Markdown",
+        "hintText": "Rich Text/ Markdown",
+        "difficulty": 2,
+        "isParameterized": True,
+        "parameters": {
+            "parameterName": "a",
+            "allowedValued": ["2", "3", "9"]
+        },
+        "lot": {
+            "lotItems": [
+                {
+                    "id": "ID of the LOT item",
+                    "lotItemText": "Text Value",
+                    "explaination": "Explaination as why this option is correct/incorrect"
+                },
+                {
+                    "id": "ID of the LOT item",
+                    "lotItemText": "Text Value",
+                    "explaination": "Explaination as why this option is correct/incorrect"
+                }
+            ]
+        },
+        "solution": {
+            "SML": {
+                "itemIds": [
+                    "ID of the solution item in the lot",
+                    "ID of the solution item in the lot"
+                ]
+            }
+        },
+        "metaDetails": {
+            "isStudentGenerated": True,
+            "isAIGenerated": False
+        },
+        "timeLimit": 300,
+        "points": 20
+    },
+    "MTL": {
+        "questionType": "MTL",
+        "questionText": "Rich Text/Markdown",
+        "hintText": "Rich Text/ Markdown",
+        "difficulty": 2,
+        "isParameterized": True,
+        "parameters": {
+            "parameterName": "a",
+            "allowedValued": ["2", "3", "9"]
+        },
+        "lots": [
+            {
                 "lotId": "ID of the LOT",
                 "lotItems": [
                     {
                         "id": "ID of the LOT item",
-                        "lotItemText": "Text Value",
-                        "explaination": "Explaination as why this option is correct/incorrect"
+                        "lotItemText": "Text Value"
                     },
                     {
                         "id": "ID of the LOT item",
-                        "lotItemText": "Text Value",
-                        "explaination": "Explaination as why this option is correct/incorrect"
+                        "lotItemText": "Text Value"
                     }
                 ]
             },
-            "solution": {
-                "SOL": {
-                    "itemId": "ID of the solution item in the lot"
-                }
-            },
-            "metaDetails": {
-                "isStudentGenerated": True,
-                "isAIGenerated": False
-            },
-            "timeLimit": 300,
-            "points": 20
-        },
-        "SML": {
-            "questionType": "SML",
-            "questionText": "Rich Text/Markdown",
-            "hintText": "Rich Text/ Markdown",
-            "difficulty": 2,
-            "isParameterized": True,
-            "parameters": {
-                "parameterName": "a",
-                "allowedValued": ["2", "3", "9"]
-            },
-            "lot": {
+            {
+                "lotId": "ID of the LOT",
                 "lotItems": [
                     {
                         "id": "ID of the LOT item",
-                        "lotItemText": "Text Value",
-                        "explaination": "Explaination as why this option is correct/incorrect"
+                        "lotItemText": "Text Value"
                     },
                     {
                         "id": "ID of the LOT item",
-                        "lotItemText": "Text Value",
-                        "explaination": "Explaination as why this option is correct/incorrect"
+                        "lotItemText": "Text Value"
                     }
                 ]
-            },
-            "solution": {
-                "SML": {
-                    "itemIds": [
-                        "ID of the solution item in the lot",
-                        "ID of the solution item in the lot"
-                    ]
-                }
-            },
-            "metaDetails": {
-                "isStudentGenerated": True,
-                "isAIGenerated": False
-            },
-            "timeLimit": 300,
-            "points": 20
+            }
+        ],
+        "solution": {
+            "MTL": {
+                "matches": [
+                    {
+                        "itemIds": [
+                            "ID of item in lot 1",
+                            "ID of item in lot 2"
+                        ]
+                    },
+                    {
+                        "itemIds": [
+                            "ID of item in lot 1",
+                            "ID of item in lot 2"
+                        ]
+                    }
+                ]
+            }
         },
-        "MTL": {
-            "questionType": "MTL",
-            "questionText": "Rich Text/Markdown",
-            "hintText": "Rich Text/ Markdown",
-            "difficulty": 2,
-            "isParameterized": True,
-            "parameters": {
-                "parameterName": "a",
-                "allowedValued": ["2", "3", "9"]
-            },
-            "lots": [
+        "metaDetails": {
+            "isStudentGenerated": True,
+            "isAIGenerated": False
+        },
+        "timeLimit": 300,
+        "points": 20
+    },
+    "OTL": {
+        "questionType": "OTL",
+        "questionText": "Rich Text/Markdown",
+        "hintText": "Rich Text/ Markdown",
+        "difficulty": 2,
+        "isParameterized": True,
+        "parameters": {
+            "parameterName": "a",
+            "allowedValued": ["2", "3", "9"]
+        },
+        "lot": {
+            "lotId": "ID of the LOT",
+            "lotItems": [
                 {
-                    "lotId": "ID of the LOT",
-                    "lotItems": [
-                        {
-                            "id": "ID of the LOT item",
-                            "lotItemText": "Text Value"
-                        },
-                        {
-                            "id": "ID of the LOT item",
-                            "lotItemText": "Text Value"
-                        }
-                    ]
+                    "id": "ID of the LOT item",
+                    "lotItemText": "Text Value"
                 },
                 {
-                    "lotId": "ID of the LOT",
-                    "lotItems": [
-                        {
-                            "id": "ID of the LOT item",
-                            "lotItemText": "Text Value"
-                        },
-                        {
-                            "id": "ID of the LOT item",
-                            "lotItemText": "Text Value"
-                        }
-                    ]
-                }
-            ],
-            "solution": {
-                "MTL": {
-                    "matches": [
-                        {
-                            "itemIds": [
-                                "ID of item in lot 1",
-                                "ID of item in lot 2"
-                            ]
-                        },
-                        {
-                            "itemIds": [
-                                "ID of item in lot 1",
-                                "ID of item in lot 2"
-                            ]
-                        }
-                    ]
+                    "id": "ID of the LOT item",
+                    "lotItemText": "Text Value"
                 }
-            },
-            "metaDetails": {
-                "isStudentGenerated": True,
-                "isAIGenerated": False
-            },
-            "timeLimit": 300,
-            "points": 20
+            ]
         },
-        "OTL": {
-            "questionType": "OTL",
-            "questionText": "Rich Text/Markdown",
-            "hintText": "Rich Text/ Markdown",
-            "difficulty": 2,
-            "isParameterized": True,
-            "parameters": {
-                "parameterName": "a",
-                "allowedValued": ["2", "3", "9"]
-            },
-            "lot": {
-                "lotId": "ID of the LOT",
-                "lotItems": [
+        "solution": {
+            "OTL": {
+                "orders": [
                     {
-                        "id": "ID of the LOT item",
-                        "lotItemText": "Text Value"
+                        "itemId": "ID of the solution item in the lot",
+                        "order": 1
                     },
                     {
-                        "id": "ID of the LOT item",
-                        "lotItemText": "Text Value"
+                        "itemId": "ID of the solution item in the lot",
+                        "order": 2
+                    },
+                    {
+                        "itemId": "ID of the solution item in the lot",
+                        "order": 3
                     }
                 ]
-            },
-            "solution": {
-                "OTL": {
-                    "orders": [
-                        {
-                            "itemId": "ID of the solution item in the lot",
-                            "order": 1
-                        },
-                        {
-                            "itemId": "ID of the solution item in the lot",
-                            "order": 2
-                        },
-                        {
-                            "itemId": "ID of the solution item in the lot",
-                            "order": 3
-                        }
-                    ]
-                }
-            },
-            "metaDetails": {
-                "isStudentGenerated": True,
-                "isAIGenerated": False
-            },
-            "timeLimit": 300,
-            "points": 20
-        }
+            }
+        },
+        "metaDetails": {
+            "isStudentGenerated": True,
+            "isAIGenerated": False
+        },
+        "timeLimit": 300,
+        "points": 20
     }
-    
-    structure = structure_types.get(question_type, structure_types["MTL"])
-    
-    model = get_gemini_model(engine)
-    responses = []
-    
+}
+
+
+def build_bulk_prompt(content, question_type, num_questions):
+    """Builds the prompt asking for num_questions questions of question_type about content."""
     # Prepare type-specific rules for bulk generation
     otl_rules = '''
     For OTL (Ordering) questions:
@@ -569,10 +407,10 @@ def generate_structured_bulk():
        - Include clear explanation for why each option is correct/incorrect''' if question_type == 'SOL' else ''
     
     # Create a single comprehensive prompt for all questions
-    bulk_prompt = f"""
+    return f"""
     Generate {num_questions} distinct questions of type {question_type} based on the following content:
     
-    {prompt}
+    {content}
     
     Follow these STRICT rules for each question:
     1. Make each question unique and distinct
@@ -595,19 +433,370 @@ def generate_structured_bulk():
     6. Ensure proper JSON formatting
     7. Each question must be complete and self-contained
     """
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), used for chunk budgeting."""
+    return len(text) // 4 + 1
+
+
+def split_oversized(text, max_tokens):
+    """Splits text without usable sentence boundaries into pieces of at most max_tokens.
+
+    Words are grouped into windows; a single word longer than the budget is cut
+    by characters.
+    """
+    max_chars = (max_tokens - 1) * 4  # Largest length estimate_tokens keeps within max_tokens
+    pieces = []
+    current = ""
+    for word in text.split():
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_content(content, max_tokens=CHUNK_TOKEN_BUDGET):
+    """Splits content into chunks of at most max_tokens (estimated).
+
+    SEGBOT segments, as returned by /generateTranscript, are kept whole where
+    they fit; anything larger is split on sentence boundaries instead, and text
+    without punctuation (e.g. raw ASR output) on word boundaries.
+    """
+    units = []
+    for segment in SEGMENT_START.split(content):
+        segment = segment.strip()
+        if not segment:
+            continue
+        if estimate_tokens(segment) <= max_tokens:
+            units.append(segment)
+            continue
+        for sentence in SENTENCE_BOUNDARY.split(segment):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+            else:
+                units.extend(split_oversized(sentence, max_tokens))
+
+    # Pack consecutive units into chunks without exceeding the budget
+    chunks = []
+    current = ""
+    for unit in units:
+        joined = f"{current}\n\n{unit}" if current else unit
+        if current and estimate_tokens(joined) > max_tokens:
+            chunks.append(current)
+            joined = unit
+        current = joined
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def difficulty_of(question):
+    """Returns the question's difficulty, or None if the model returned something unusable."""
+    difficulty = question.get('difficulty')
+    return difficulty if isinstance(difficulty, (int, float, str)) else None
+
+
+def select_balanced_questions(candidates, num_questions):
+    """Picks num_questions from per-chunk candidate lists.
+
+    Chunks are visited round-robin, starting with evenly spaced ones when there
+    are more chunks than questions, and from each chunk the candidate whose
+    difficulty is least represented so far is taken, so the selection covers the
+    whole content with a mix of difficulty levels.
+    """
+    pools = [list(pool) for pool in candidates if pool]
+    if not pools:
+        return []
+
+    spread = sorted({int(k * len(pools) / num_questions) for k in range(min(num_questions, len(pools)))})
+    order = spread + [i for i in range(len(pools)) if i not in spread]
+
+    selected = []
+    difficulty_counts = {}
+    while len(selected) < num_questions and any(pools):
+        for i in order:
+            pool = pools[i]
+            if not pool or len(selected) >= num_questions:
+                continue
+            best = min(range(len(pool)), key=lambda j: difficulty_counts.get(difficulty_of(pool[j]), 0))
+            question = pool.pop(best)
+            difficulty = difficulty_of(question)
+            difficulty_counts[difficulty] = difficulty_counts.get(difficulty, 0) + 1
+            selected.append(question)
+    return selected
+
+
+def plan_map_reduce(content, question_type, num_questions, structure, max_tokens=CHUNK_TOKEN_BUDGET):
+    """Returns the (prompt, structure) pairs to generate for the content.
+
+    Only as many chunks as the oversampled question count needs are used,
+    evenly spaced through the content. Raises ValueError if the content needs more than MAX_MAP_CHUNKS chunks even
+    at MAX_CHUNK_TOKENS per chunk.
+    """
+    chunks = split_content(content, max_tokens)
+    # Grow the chunks rather than fanning out into more model calls
+    while len(chunks) > MAX_MAP_CHUNKS and max_tokens < MAX_CHUNK_TOKENS:
+        max_tokens = min(max_tokens * 2, MAX_CHUNK_TOKENS)
+        chunks = split_content(content, max_tokens)
+    if len(chunks) > MAX_MAP_CHUNKS:
+        raise ValueError(f"Content is too long (about {estimate_tokens(content)} tokens) to generate questions from")
+    if not chunks:
+        return []
+
+    # Over-generate slightly so the reduce step has something to choose from
+    num_candidates = math.ceil(num_questions * CANDIDATE_OVERSAMPLE)
+    num_calls = min(len(chunks), num_candidates)
+    per_chunk = math.ceil(num_candidates / num_calls)
+    # Centre of each of num_calls equal spans, so no part of the content is favoured
+    selected = [chunks[int((k + 0.5) * len(chunks) / num_calls)] for k in range(num_calls)]
+    return [
+        (build_bulk_prompt(chunk, question_type, per_chunk), {"questions": [structure] * per_chunk})
+        for chunk in selected
+    ]
+
+
+def chunk_candidates(result):
+    """Returns the usable questions from one chunk's generation result."""
+    if not isinstance(result, dict) or "error" in result:
+        return []
+    questions = result.get("questions")
+    if not isinstance(questions, list):
+        return []
+    return [question for question in questions if isinstance(question, dict)]
+
+
+def reduce_chunk_results(results, num_questions):
+    """Picks num_questions from the per-chunk generation results.
+
+    If only some chunks failed, the questions from the others are returned
+    together with the failed chunks' errors under "chunkErrors".
+    """
+    if not results:
+        return {"error": "No content to generate questions from"}
+
+    candidates = [chunk_candidates(result) for result in results]
+    chunk_errors = [
+        {"chunk": i, "error": result["error"] if isinstance(result, dict) and "error" in result
+         else "LLM response did not contain any questions"}
+        for i, (result, pool) in enumerate(zip(results, candidates)) if not pool
+    ]
+    if not any(candidates):
+        # No chunk produced usable questions; surface the first error
+        return {"error": chunk_errors[0]["error"]}
+
+    response = {"questions": select_balanced_questions(candidates, num_questions)}
+    if chunk_errors:
+        print(f"{len(chunk_errors)} of {len(results)} chunks failed: {chunk_errors}")
+        response["chunkErrors"] = chunk_errors
+    return response
+
+
+def generate_structured_map_reduce(model, content, question_type, num_questions, params, structure,
+                                   max_tokens=CHUNK_TOKEN_BUDGET):
+    """Generates questions for content that is too long for a single prompt.
+
+    Map: content is split into token-budgeted chunks and candidate questions are
+    generated for every chunk in parallel. Reduce: num_questions are picked from
+    the candidates locally, without another model call.
+    """
+    try:
+        jobs = plan_map_reduce(content, question_type, num_questions, structure, max_tokens)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    results = []
+    if jobs:
+        with ThreadPoolExecutor(max_workers=min(MAP_MAX_WORKERS, len(jobs))) as executor:
+            results = list(executor.map(
+                lambda job: generate_structured_text(model, job[0], params, job[1]), jobs
+            ))
+    return reduce_chunk_results(results, num_questions)
+
+
+def parse_int_field(data, key, default):
+    """Reads an integer request field; numeric strings are accepted, other types are not."""
+    value = data.get(key, default)
+    # bool is a subclass of int, and floats would be truncated (or overflow, for Infinity)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{key} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{key} must be an integer")
+
+
+def parse_bulk_request(data):
+    """Reads the /generate-structured-bulk request body, applying defaults and limits.
+
+    Raises ValueError for values that cannot be used.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+
+    prompt = data.get('prompt', '')
+    if not isinstance(prompt, str):
+        raise ValueError("prompt must be a string")
+
+    num_questions = parse_int_field(data, 'numQuestions', 1)
+    chunk_tokens = parse_int_field(data, 'chunkTokens', CHUNK_TOKEN_BUDGET)
+    if not 1 <= num_questions <= MAX_BULK_QUESTIONS:
+        raise ValueError(f"numQuestions must be between 1 and {MAX_BULK_QUESTIONS}")
+    chunk_tokens = min(max(chunk_tokens, MIN_CHUNK_TOKENS), MAX_CHUNK_TOKENS)
+
+    long_content = data.get('longContent')
+    if long_content is None:
+        # Long content (e.g. a full lecture transcript) goes through map-reduce by default
+        long_content = estimate_tokens(prompt) > chunk_tokens
+    elif not isinstance(long_content, bool):
+        raise ValueError("longContent must be true or false")
+
+    return {
+        "engine": data.get('engine', 'models/gemma-3-27b-it'),
+        "prompt": prompt,
+        "question_type": data.get('questionType', 'MTL'),
+        "num_questions": num_questions,
+        "params": data.get('params', {}),
+        "chunk_tokens": chunk_tokens,
+        "long_content": long_content,
+    }
+
+
+def extract_youtube_audio(youtube_url):
+    """Downloads the audio of a YouTube video into UPLOAD_FOLDER as a .wav file."""
+    # Define yt-dlp options
+    ydl_opts = {
+        'format': 'bestaudio/best',  # Download the best audio
+        'extractaudio': True,        # Extract audio (no video)
+        'audioquality': 0,           # Best quality for audio
+        'outtmpl': f'{UPLOAD_FOLDER}/youtube_%(title)s.%(ext)s',  # Use video title for filename
+        'quiet': False,              # Show download progress
+    }
     
-    # Generate all questions in one API call
-    response = generate_structured_text(model, bulk_prompt, params, {
-        "questions": [structure] * num_questions  # Array of question structures
-    })
+    # Create and run yt-dlp instance to download audio
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info_dict = ydl.extract_info(youtube_url, download=True)
+        audio_file = ydl.prepare_filename(info_dict)
+
+    output_wav = audio_file.rsplit('.', 1)[0] + '.wav'  # Change the extension to .wav
+
+    # Run FFmpeg conversion command
+    subprocess.run(['ffmpeg', '-i', audio_file, output_wav])
+
+    # Optionally, delete the original audio file (if you don't need it)
+    os.remove(audio_file)
+
+
+@app.route("/upload-audio", methods=["POST"])
+def upload_audio():
+    audio_file = request.files.get("audio_file")
+    if audio_file:
+        audio_file.save(os.path.join(UPLOAD_FOLDER, audio_file.filename))
+        return jsonify({"message": "Audio uploaded successfully!"}), 200
+    return jsonify({"error": "No audio file provided."}), 400
+
+@app.route("/", methods=["GET"])
+def index():
+    return jsonify({"message": "Welcome to the Gemini API!"})
+
+@app.route("/download-youtube-audio", methods=["POST"])
+def download_youtube_audio():
+    data = request.get_json()
+    youtube_url = data.get("youtube_url")
+
+    if not youtube_url:
+        return jsonify({"error": "YouTube URL is required"}), 400
+
+    try: 
+        extract_youtube_audio(youtube_url)
+        return jsonify({"message": "Audio extracted successfully!"}), 200
+    except Exception as e:
+        print(f"Error: {e}")
+        return jsonify({"error": "Failed to extract audio."}), 500
+
+@app.route("/get-files", methods=["GET"])
+def get_files():
+    """Fetches the list of uploaded audio files."""
+    files = [f for f in os.listdir(UPLOAD_FOLDER) if f.endswith(".wav")]
+    return jsonify(files)
+
+@app.route("/generateTranscript", methods=['POST'])
+def generate_transcript():
+    """Generates transcript using OpenAI Whisper model."""
+    data = request.get_json()
+    filename = data.get('filename')
+
+    if not filename or not os.path.exists(filename):
+        return jsonify({"error": "File not found"}), 400
+
+    try:
+        # Whisper transcription followed by SEGBOT segmentation
+        # The inference server may run from a different working directory
+        lines = run_inference_job("transcribe", os.path.abspath(filename))
+        segmented_transcript = run_inference_job("segment", lines)
+
+        # The variable 'segmented_transcript' now contains the segmented transcript
+
+        return jsonify({"transcript": segmented_transcript})
+    except Exception as e:
+        print(e)
+        return jsonify({"error": f"Error generating transcript: {str(e)}"}), 500
+
+
+
+@app.route('/generate', methods=['POST'])
+def generate():
+    """Endpoint for generating text."""
+    data = request.get_json()
+    engine = data.get('engine', 'models/gemma-3-27b-it')  # Default to gemini-pro
+    prompt = data.get('prompt', '')
+    params = data.get('params', {})
+
+    model = get_gemini_model(engine)
+    response = generate_text(model, prompt, params)
+
+    return jsonify({'response': response})
+
+
+@app.route('/generate-structured-bulk', methods=['POST'])
+def generate_structured_bulk():
+    try:
+        bulk = parse_bulk_request(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    structure = STRUCTURE_TYPES.get(bulk["question_type"], STRUCTURE_TYPES["MTL"])
+
+    model = get_gemini_model(bulk["engine"])
+
+    if bulk["long_content"]:
+        response = generate_structured_map_reduce(model, bulk["prompt"], bulk["question_type"],
+                                                  bulk["num_questions"], bulk["params"], structure,
+                                                  bulk["chunk_tokens"])
+    else:
+        # Generate all questions in one API call
+        bulk_prompt = build_bulk_prompt(bulk["prompt"], bulk["question_type"], bulk["num_questions"])
+        response = generate_structured_text(model, bulk_prompt, bulk["params"], {
+            "questions": [structure] * bulk["num_questions"]  # Array of question structures
+        })
     
     if "error" in response:
         return jsonify({"error": response["error"]}), 400
     
-    # Return the array of questions
-    return jsonify({
-        "responses": response.get("questions", [])
-    })
+    # Return the array of questions, noting any chunks that failed
+    result = {"responses": response.get("questions", [])}
+    if "chunkErrors" in response:
+        result["chunkErrors"] = response["chunkErrors"]
+    return jsonify(result)
 
 
 if __name__ == '__main__':